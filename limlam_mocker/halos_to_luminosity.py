@@ -1,13 +1,12 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy as sp
-import astropy.units as u
-import astropy.constants as const
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from .tools import *
+from . import kernels
 
 sfr_interp_tab = None
+sfr_interp_grids = None
 
 """
 Functions for converting simulated halo properties to mock luminosities
@@ -54,19 +53,35 @@ def Mhalo_to_Ls(halos, params):
     except AttributeError:
         params.save_scatterless_lums = None
 
-    # calculate CO luminosities for each halo without any scatter
-    halos.Lco = Mhalo_to_Lco(halos, params, scatter=False)
-    print('done CO luminosities')
+    # calculate CO and (if required) catalog luminosities for each halo
+    # without any scatter
+    if params.catalog_model:
+        if params.model in _SFR_LCO_MODELS and params.catalog_model in _SFR_LCAT_MODELS:
+            # both tracers want the cached halos.sfr -- keep them sequential
+            # so the first call fills the cache for the second
+            halos.Lco = Mhalo_to_Lco(halos, params, scatter=False)
+            print('done CO luminosities')
+            halos.Lcat, params = Mhalo_to_Lcatalog(halos, params)
+            print('done catalog luminosities')
+        else:
+            # otherwise the two tracers are data-independent, so evaluate
+            # them concurrently (the numba kernels release the GIL)
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                co_future = pool.submit(Mhalo_to_Lco, halos, params, scatter=False)
+                cat_future = pool.submit(Mhalo_to_Lcatalog, halos, params)
+                halos.Lco = co_future.result()
+                halos.Lcat, params = cat_future.result()
+            print('done CO and catalog luminosities')
+    else:
+        halos.Lco = Mhalo_to_Lco(halos, params, scatter=False)
+        print('done CO luminosities')
 
-    # calculate catalog luminosities for each halo without any scatter
     if params.catalog_model:
-        halos.Lcat, params = Mhalo_to_Lcatalog(halos, params)
-        print('done catalog luminosities')
 
         # for testing--save the unscattered luminosity values
         if params.save_scatterless_lums:
-            halos.scatterless_Lco = copy.deepcopy(halos.Lco)
-            halos.scatterless_Lcat = copy.deepcopy(halos.Lcat)
+            halos.scatterless_Lco = halos.Lco.copy()
+            halos.scatterless_Lcat = halos.Lcat.copy()
 
         # calculate the joint scatter
         halos = add_co_tracer_dependant_scatter(halos, params.rho, params.codex, params.catdex, params.lum_uncert_seed)
@@ -74,13 +89,27 @@ def Mhalo_to_Ls(halos, params):
     else: 
         # for testing--save the unscattered luminosity values
         if params.save_scatterless_lums:
-            halos.scatterless_Lco = copy.deepcopy(halos.Lco)
+            halos.scatterless_Lco = halos.Lco.copy()
 
         # co-only scatter
         halos.Lco = add_log_normal_scatter(halos.Lco, params.codex, params.lum_uncert_seed)
 
 
 
+def _coerce_dtype(halos, params):
+    """
+    cast the hot per-halo inputs to the working precision set by params.dtype
+    (float32 by default). the emission models are phenomenological fits with
+    ~0.3 dex of intrinsic scatter, so 32-bit precision is plenty and halves
+    the memory traffic through the model kernels
+    """
+    dtype = getattr(params, 'dtype', None)
+    if dtype is None:
+        return
+    halos.M = np.ascontiguousarray(halos.M, dtype=dtype)
+    halos.redshift = np.ascontiguousarray(halos.redshift, dtype=dtype)
+
+
 @timeme
 def Mhalo_to_Lco(halos, params, scatter=True):
     """
@@ -98,16 +127,12 @@ def Mhalo_to_Lco(halos, params, scatter=True):
     coeffs : array-like
         None for default coeffs
     """
-    dict = {'Li':          Mhalo_to_Lco_Li,
-            'Li_sc':       Mhalo_to_Lco_Li_sigmasc,
-            'Padmanabhan': Mhalo_to_Lco_Padmanabhan,
-            'fiuducial':   Mhalo_to_Lco_fiuducial,
-            'Yang':        Mhalo_to_Lco_Yang,
-            'arbitrary':   Mhalo_to_Lco_arbitrary,
-            }
+    model_func = _LCO_MODELS.get(params.model)
 
-    if params.model in dict.keys():
-        return dict[params.model](halos, params.co_model_coeffs, scatter=scatter)
+    if model_func is not None:
+        _coerce_dtype(halos, params)
+        Lco = model_func(halos, params.co_model_coeffs, scatter=scatter)
+        return np.asarray(Lco, dtype=getattr(params, 'dtype', Lco.dtype))
 
     else:
         sys.exit('\n\n\tYour model, '+params.model+', does not seem to exist\n\t\tPlease check src/halos_to_luminosity.py to add it\n\n')
@@ -124,19 +149,16 @@ def Mhalo_to_Lco_Li(halos, coeffs, scatter=True):
             0.0, 1.37,-1.74, 0.3, 0.3, 1.0)
     else:
         log_delta_mf,alpha,beta,sigma_sfr,sigma_lco,scale = coeffs;
-    delta_mf = 10**log_delta_mf;
 
     # Get Star formation rate
     if not hasattr(halos,'sfr'):
         halos.sfr = Mhalo_to_sfr_Behroozi(halos, sigma_sfr);
 
-    # infrared luminosity
-    lir      = halos.sfr * 1e10 / delta_mf
+    # sfr -> infrared luminosity -> Lco' -> Lco in L_sun, fused into a
+    # single pass with the delta_mf and beta terms folded into scalars
     alphainv = 1./alpha
-    # Lco' (observers units)
-    Lcop     = lir**alphainv * 10**(-beta * alphainv)
-    # Lco in L_sun
-    Lco      =  4.9e-5 * Lcop * scale
+    log_factor = -(beta + log_delta_mf) * alphainv
+    Lco      = kernels.li_lco(halos.sfr, alphainv, log_factor, 4.9e-5 * scale)
     if scatter:
         Lco      = add_log_normal_scatter(Lco, sigma_lco, 2)
 
@@ -156,25 +178,35 @@ def Mhalo_to_Lco_Li_sigmasc(halos, coeffs, scatter=True):
             0.0, 1.37,-1.74, 0.3)
     else:
         log_delta_mf,alpha,beta,sigma_sc = coeffs;
-    delta_mf = 10**log_delta_mf;
 
     # Get Star formation rate
     if not hasattr(halos,'sfr'):
         halos.sfr = Mhalo_to_sfr_Behroozi(halos, 0);
 
-    # infrared luminosity
-    lir      = halos.sfr * 1e10 / delta_mf
+    # sfr -> infrared luminosity -> Lco' -> Lco in L_sun, fused into a
+    # single pass with the delta_mf and beta terms folded into scalars
     alphainv = 1./alpha
-    # Lco' (observers units)
-    Lcop     = lir**alphainv * 10**(-beta * alphainv)
-    # Lco in L_sun
-    Lco      =  4.9e-5 * Lcop
+    log_factor = -(beta + log_delta_mf) * alphainv
+    Lco      = kernels.li_lco(halos.sfr, alphainv, log_factor, 4.9e-5)
 
     if scatter:
         Lco      = add_log_normal_scatter(Lco, sigma_sc, 2) 
 
     return Lco
 
+def _unique_z_grid(z):
+    """
+    light-cone catalogs often repeat the same redshift across many halos, so
+    coefficient polynomials that depend only on z can be evaluated once per
+    unique value and gathered back with the returned inverse index. if the
+    redshifts are mostly distinct the tabulation wouldn't pay for itself, so
+    inv comes back as None and the caller should work per-halo as before
+    """
+    uniq_z, inv = np.unique(z, return_inverse=True)
+    if uniq_z.size > z.size // 2:
+        return z, None
+    return uniq_z, inv
+
 def Mhalo_to_Lco_Padmanabhan(halos, coeffs, scatter=True):
     """
     halo mass to L_CO
@@ -191,12 +223,19 @@ def Mhalo_to_Lco_Padmanabhan(halos, coeffs, scatter=True):
     z  = halos.redshift
     hm = halos.M
 
-    m1 = 10**(np.log10(m10)+m11*z/(z+1))
-    n  = n10 + n11 * z/(z+1)
-    b  = b10 + b11 * z/(z+1)
-    y  = y10 + y11 * z/(z+1)
+    # the coefficients are polynomials in redshift only, so evaluate them on
+    # the unique redshift values and gather back out to the halos
+    zvals, inv = _unique_z_grid(z)
+    zfrac = zvals/(zvals+1)
+
+    m1 = 10**(np.log10(m10)+m11*zfrac)
+    n  = n10 + n11 * zfrac
+    b  = b10 + b11 * zfrac
+    y  = y10 + y11 * zfrac
+    if inv is not None:
+        m1, n, b, y = m1[inv], n[inv], b[inv], y[inv]
 
-    Lprime = 2 * n * hm / ( (hm/m1)**(-b) + (hm/m1)**y )
+    Lprime = kernels.mass_double_powerlaw(hm, m1, -b, y, 2*n)
     Lco    = 4.9e-5 * Lprime * fduty
 
     return Lco
@@ -217,7 +256,7 @@ def Mhalo_to_Lco_fiuducial(halos, coeffs, scatter=True):
     C = 10**logC
     M = 10**logM
 
-    Lprime = C / ((Mh/M)**A + (Mh/M)**B)
+    Lprime = kernels.double_powerlaw(Mh, M, A, B, C)
     Lco = 4.9e-5 * Lprime
     if scatter:
         Lco = add_log_normal_scatter(Lco, sigma, 3)
@@ -239,29 +278,34 @@ def Mhalo_to_Lco_Yang(halos, coeffs, scatter=True):
     z = halos.redshift
     Mh = halos.M
 
+    # every coefficient here is a polynomial in redshift only, so evaluate
+    # them on the unique redshift values and gather back out to the halos
+    zvals, inv = _unique_z_grid(z)
+
     # Lco function
-    logM1 = 12.13 - 0.1678*z
-    logN = -6.855 + 0.2366*z - 0.05013*z**2
-    alpha = 1.642 + 0.1663*z - 0.03238*z**2
+    logM1 = 12.13 - 0.1678*zvals
+    logN = -6.855 + 0.2366*zvals - 0.05013*zvals**2
+    alpha = 1.642 + 0.1663*zvals - 0.03238*zvals**2
     beta = 1.77*np.exp(-1/2.72) - 0.00827
 
     M1 = 10**logM1
     N = 10**logN
 
-    Lco = 2*N * Mh / ((Mh/M1)**(-alpha) + (Mh/M1)**(-beta))
-
     # fduty function
-    logM2 = 11.73 + 0.6634*z
-    gamma = 1.37 - 0.190*z + 0.0215*z**2
+    logM2 = 11.73 + 0.6634*zvals
+    gamma = 1.37 - 0.190*zvals + 0.0215*zvals**2
 
     M2 = 10**logM2
 
-    fduty = 1 / (1 + (Mh/M2)**gamma)
+    # scatter
+    sigmaco = 0.357 - 0.0701*zvals + 0.00621*zvals**2
 
-    Lco = Lco * fduty
+    if inv is not None:
+        M1, N, alpha = M1[inv], N[inv], alpha[inv]
+        M2, gamma, sigmaco = M2[inv], gamma[inv], sigmaco[inv]
 
-    # scatter
-    sigmaco = 0.357 - 0.0701*z + 0.00621*z**2
+    Lco = kernels.mass_double_powerlaw(Mh, M1, -alpha, -beta, 2*N)
+    Lco = Lco * kernels.yang_fduty(Mh, M2, gamma)
     if scatter:
         Lco = add_log_normal_scatter(Lco, sigmaco, 4)
     return Lco
@@ -295,11 +339,33 @@ def Mhalo_to_Lco_arbitrary(halos, coeffs, scatter=True):
         halos.sfr = Mhalo_to_sfr_Behroozi(halos, sigma_sfr, bad_extrapolation)
     return lco_func(halos)
 
+def _get_logM(halos):
+    """
+    cache log10 of the halo masses on the catalog the first time any model
+    needs it (several models and the abundance-matching path all want it)
+    """
+    if not hasattr(halos, 'logM'):
+        halos.logM = np.log10(halos.M)
+    return halos.logM
+
+def _get_logzp1(halos):
+    """same caching for log10(1+z), used by the Behroozi SFR lookup"""
+    if not hasattr(halos, 'log_zp1'):
+        halos.log_zp1 = np.log10(halos.redshift+1)
+    return halos.log_zp1
+
 def Mhalo_to_sfr_Behroozi(halos, sigma_sfr, bad_extrapolation=False):
     global sfr_interp_tab
     if sfr_interp_tab is None:
         sfr_interp_tab = get_sfr_table(bad_extrapolation)
-    sfr = sfr_interp_tab.ev(np.log10(halos.M), np.log10(halos.redshift+1))
+    logM = _get_logM(halos)
+    logzp1 = _get_logzp1(halos)
+    if kernels.HAVE_NUMBA:
+        # threaded bilinear lookup straight off the table grids
+        dat_logm, dat_logzp1, dat_sfr = sfr_interp_grids
+        sfr = kernels.bilinear_sfr(logM, logzp1, dat_logm, dat_logzp1, dat_sfr)
+    else:
+        sfr = sfr_interp_tab(np.stack([logM, logzp1], axis=-1))
     if sigma_sfr > 0:
         sfr = add_log_normal_scatter(sfr, sigma_sfr, 1)
     return sfr
@@ -332,10 +398,18 @@ def get_sfr_table(bad_extrapolation=False):
         badspl = SmoothBivariateSpline(dat_logzp1_[-1000<(dat_logsfr)],dat_logm_[-1000<(dat_logsfr)],dat_logsfr[-1000<(dat_logsfr)],kx=4,ky=4)
         dat_sfr[dat_logsfr==-1000.] = 10**badspl(dat_logzp1,dat_logm).T[dat_logsfr==-1000.]
 
-    # Get interpolated SFR value(s)
-    sfr_interp_tab = sp.interpolate.RectBivariateSpline(
-                            dat_logm, dat_logzp1, dat_sfr,
-                            kx=1, ky=1)
+    # keep the raw grids around for the jitted lookup kernel
+    global sfr_interp_grids
+    sfr_interp_grids = (dat_logm, dat_logzp1, dat_sfr)
+
+    # Get interpolated SFR value(s) -- this is plain bilinear interpolation
+    # on a regular grid, so use RegularGridInterpolator (linear method,
+    # extrapolating past the table edges) rather than paying the FITPACK
+    # dispatch of a kx=ky=1 RectBivariateSpline
+    from scipy.interpolate import RegularGridInterpolator
+    sfr_interp_tab = RegularGridInterpolator(
+                            (dat_logm, dat_logzp1), dat_sfr,
+                            method='linear', bounds_error=False, fill_value=None)
     return sfr_interp_tab
 
 
@@ -355,9 +429,15 @@ def halomassfunction(halos, params):
     calculates the number density of dM halos per logarithmic mass bin between log10M and log10(M+dM)
     then integrates that from each M to infinity to get the halo mass function
     """
-    
+    import astropy.units as u
+
+
     # NUMBER of halos with log masses between log10M and log10(M+dM)
-    N, logMprime = np.histogram(np.log10(halos.M), bins=500)
+    # (single-pass parallel counter; edges match np.histogram(bins=500))
+    logM = _get_logM(halos)
+    lo, hi = logM.min(), logM.max()
+    N = kernels.binned_count(logM, lo, hi, 500)
+    logMprime = np.linspace(lo, hi, 501)
     dlogMprime = logMprime[1:] - logMprime[:-1]
     logMprimecents = logMprime[:-1] + dlogMprime / 2
     
@@ -370,14 +450,10 @@ def halomassfunction(halos, params):
     dndlogM = N / vol    
     
     # integrated from M to infinity at each value of M
+    # (a reverse cumulative sum, so do it in one vectorized pass)
     dndlogMdlogM = dndlogM * dlogMprime
-    intnM = []
-    for i,M in enumerate(logMprimecents):
-        intval = np.sum(dndlogMdlogM[i:])
-        intnM.append(intval.value)
+    intnM = np.cumsum(dndlogMdlogM.value[::-1])[::-1]
 
-    intnM = np.array(intnM)
-    
     return (logMprimecents, intnM)
 
 def abundancematch(function, coeffs, halos, params):
@@ -408,23 +484,24 @@ def abundancematch(function, coeffs, halos, params):
     dLprime = 10**logLprime[1:] - 10**logLprime[:-1]
     logLprimecents = logLprime[:-1] + dlogLprime/2
     
+    # luminosity function is in erg/s but the units were only ever stripped
+    # off again below, so keep this as a plain ndarray and skip the astropy
+    # Quantity wrapping
     phiLarr = function(10**logLprimecents, coeffs)
-    phiLdL = phiLarr*dLprime*u.erg/u.s
+    phiLdL = phiLarr*dLprime
 
-    # integrate over it
-    intL = []
-    for i,L in enumerate(logLprimecents):
-        intLval = np.sum(phiLdL[i:])
-        intL.append(intLval.value)
+    # integrate over it (reverse cumulative sum in one vectorized pass).
+    # leave it in the ascending orientation np.interp wants, paired with a
+    # reversed view of the luminosity grid, so nothing needs flipping below
+    intL_rev = np.cumsum(phiLdL[::-1])
+    logL_rev = logLprimecents[::-1]
 
-    intL = np.array(intL)
-    
     # claculate the halo mass function
     logMprimecents, intnM = halomassfunction(halos, params)
-    
+
     # interpolate between the two to get luminosities
-    intMforM = np.interp(np.log10(halos.M), logMprimecents, intnM)
-    LforintM = np.interp(intMforM, np.flip(intL), np.flip(logLprimecents))
+    intMforM = np.interp(_get_logM(halos), logMprimecents, intnM)
+    LforintM = np.interp(intMforM, intL_rev, logL_rev)
     
     # convert to solar luminosities and store in the halo catalog
     halos.Lcat = 10**LforintM / 3.826e33 
@@ -453,15 +530,11 @@ def Mhalo_to_Lcatalog(halos, params):
 
     model = params.catalog_model
 
-    dict = {'lya_chung':            Mhalo_to_LLya_Chung,
-            'schechter':           Mhalo_to_Lcatalog_schechter,
-            'schechter_amp':        Mhalo_to_Lcatalog_schechter_amp,
-            'default':          Mhalo_to_Lcatalog_test1,
-            'test2':          Mhalo_to_Lcatalog_test2
-            }
+    model_func = _LCAT_MODELS.get(model)
 
-    if model in dict.keys():
-        return dict[model](halos, params)
+    if model_func is not None:
+        _coerce_dtype(halos, params)
+        return model_func(halos, params)
 
     else:
         sys.exit('\n\n\tYour catalog model, '+model+', does not seem to exist\n\t\tPlease check src/halos_to_luminosity.py to add it\n\n')
@@ -490,17 +563,9 @@ def Mhalo_to_LLya_Chung(halos, params):
     z = halos.redshift
     sfr = halos.sfr
 
-    # escape fraction
-    fesc = (1+np.exp(-1.6*z + 5))**(-0.5) * (0.18 + 0.82 / (1 + 0.8*sfr**0.875))**2
-
-    # Llya in erg/s
-    Llya = 1.6e42 * sfr * fesc
-
-    # convert to Lsun
-    Llya = Llya / 3.826e33
-
-    # zero out NaNs
-    Llya[np.where(np.isnan(Llya))] = 0.0
+    # escape fraction times 1.6e42 erg/s per SFR, converted to Lsun with
+    # NaNs zeroed out, all in one fused pass
+    Llya = kernels.llya_chung(sfr, z)
 
     params.catdex = sigma_sfr #**** this is just a placeholder
 
@@ -561,7 +626,7 @@ def Mhalo_to_Lcatalog_test1(halos, params):
     C = 10**logC
     M = 10**logM
 
-    Lprime = C / ((Mh/M)**A + (Mh/M)**B)
+    Lprime = kernels.double_powerlaw(Mh, M, A, B, C)
     Lcatalog = 4.9e-5 * Lprime
 
     params.catdex = sigma
@@ -594,7 +659,7 @@ def Mhalo_to_Lcatalog_test2(halos, params):
     C = 10**logC
     M = 10**logM
 
-    Lprime = C / ((Mh/M)**A + (Mh/M)**B)
+    Lprime = kernels.double_powerlaw(Mh, M, A, B, C)
     Lcatalog = 4.9e-5 * Lprime
 
     params.catdex = sigma
@@ -608,17 +673,28 @@ def add_log_normal_scatter(data,dex,seed):
     [via @tonyyli - https://github.com/dongwooc/imapper2]
     Note: scatter maintains mean in linear space (not log space).
     """
-    if np.any(dex<=0):
+    # dex is a scalar at every current call site -- skip the numpy reduction
+    # in that case and keep the array check only as a fallback
+    if np.isscalar(dex):
+        if dex <= 0:
+            return data
+    elif np.any(dex<=0):
         return data
     # Calculate random scalings
     sigma       = dex * 2.302585 # Stdev in log space (DIFFERENT from stdev in linear space), note: ln(10)=2.302585
     mu          = -0.5*sigma**2
 
     # Set standard seed so changing minimum mass cut
-    # does not change the high mass halos
-    np.random.seed(seed*13579)
-    randscaling = np.random.lognormal(mu, sigma, data.shape)
-    xscattered  = np.where(data > 0, data*randscaling, data)
+    # does not change the high mass halos. use a local generator rather than
+    # reseeding the global numpy RNG, so concurrent callers don't stomp on
+    # each other's random state
+    rng = np.random.default_rng(seed*13579)
+    randscaling = rng.lognormal(mu, sigma, data.shape)
+
+    # scatter in-place into a single output copy -- only the positive
+    # entries get scaled, everything else keeps its input value
+    xscattered = data.copy()
+    np.multiply(xscattered, randscaling, out=xscattered, where=data > 0)
 
     return xscattered
 
@@ -657,22 +733,49 @@ def add_co_tracer_dependant_scatter(halos, rho, codex, catdex, seed):
     sigmatr = catdex * 2.30285
     mutr = -0.5*sigmatr**2
 
-    # mean and convariance matrix for the joint distribution
-    mean = [0,0]
+    # convariance matrix for the joint distribution
     cov = [[sigmaco**2, sigmaco*sigmatr*rho],
            [sigmaco*sigmatr*rho, sigmatr**2]]
     halos.cov = cov
 
-    # LINEAR normal scalings for co and the halo tracer
-    coscale, trscale = scalerng.multivariate_normal(mean, cov, size=len(halos.Lco)).T
+    # the covariance matrix is only 2x2, so write its Cholesky factors out
+    # directly instead of going through multivariate_normal
+    L11 = sigmaco
+    L21 = sigmatr * rho
+    L22 = sigmatr * np.sqrt(1 - rho**2)
 
-    # change those into lognormal scalings (output of this would be the same as pulling from
-    # np.random.lognormal for a single variable)
-    logscaleco = np.exp(coscale + muco)
-    logscaletr = np.exp(trscale + mutr)
+    # two independent standard normal draws per halo
+    n1 = scalerng.standard_normal(len(halos.Lco))
+    n2 = scalerng.standard_normal(len(halos.Lco))
 
-    # slap scalings onto existing catalog and co luminosities
-    halos.Lco = halos.Lco*logscaleco
-    halos.Lcat = halos.Lcat*logscaletr
+    # fold the draws into correlated lognormal scalings (output would be the
+    # same as pulling from np.random.lognormal for a single variable) and
+    # multiply them onto the luminosities in one fused in-place pass
+    kernels.apply_corr_scatter(halos.Lco, halos.Lcat, n1, n2, L11, L21, L22, muco, mutr)
 
     return halos
+
+
+### MODEL DISPATCH TABLES
+# built once at import time so the wrappers don't rebuild a dict per call --
+# add new models here for them to be selectable in the parameter file
+_LCO_MODELS = {'Li':          Mhalo_to_Lco_Li,
+               'Li_sc':       Mhalo_to_Lco_Li_sigmasc,
+               'Padmanabhan': Mhalo_to_Lco_Padmanabhan,
+               'fiuducial':   Mhalo_to_Lco_fiuducial,
+               'Yang':        Mhalo_to_Lco_Yang,
+               'arbitrary':   Mhalo_to_Lco_arbitrary,
+               }
+
+_LCAT_MODELS = {'lya_chung':     Mhalo_to_LLya_Chung,
+                'schechter':     Mhalo_to_Lcatalog_schechter,
+                'schechter_amp': Mhalo_to_Lcatalog_schechter_amp,
+                'default':       Mhalo_to_Lcatalog_test1,
+                'test2':         Mhalo_to_Lcatalog_test2,
+                }
+
+# the models that compute (and cache) halos.sfr -- when a model from each
+# table is requested the two tracer calculations share that cache and have
+# to run sequentially rather than in parallel threads
+_SFR_LCO_MODELS = ('Li', 'Li_sc', 'arbitrary')
+_SFR_LCAT_MODELS = ('lya_chung',)
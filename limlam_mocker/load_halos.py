@@ -4,8 +4,8 @@ from astropy.cosmology import FlatLambdaCDM
 import astropy.units as u 
 import astropy.constants as const
 from scipy.ndimage import gaussian_filter1d, uniform_filter1d
-import copy
 from  .tools import *
+from . import kernels
 
 """
 Functions for loading and manipulating a catalogue of simulated halos
@@ -19,14 +19,69 @@ class HaloCatalog():
     """
 
     def __init__(self, params, inputfile=None, load_all=False):
+        self._cols = {}
+        # one generator for all of the catalog's random draws (velocity
+        # scatter, inclinations, observational selection), seeded once here
+        # so re-runs are reproducible end to end
+        self._rng = np.random.default_rng(getattr(params, 'rng_seed', None))
         if inputfile:
             self.load(inputfile, params)
             self.cull(params)
         else:
             pass
 
+    def __setattr__(self, name, value):
+        """
+        keep the per-halo data columns in a single dict store (self._cols)
+        so the cutting routines can bulk-index exactly those. any 1D array
+        assigned to the catalog -- masses, positions, luminosities,
+        velocities added later by other modules -- counts as a column;
+        everything else (scalars, cosmology, header values) lives on the
+        instance as usual
+        """
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+            return
+        cols = self.__dict__.setdefault('_cols', {})
+        if isinstance(value, np.ndarray) and value.ndim == 1:
+            cols[name] = value
+            self.__dict__.pop(name, None)
+        else:
+            cols.pop(name, None)
+            object.__setattr__(self, name, value)
+
+    def __getattr__(self, name):
+        # only reached when normal attribute lookup fails -- route the
+        # column names through the dict store
+        try:
+            return self.__dict__['_cols'][name]
+        except KeyError:
+            raise AttributeError("'HaloCatalog' object has no attribute '%s'" % name)
+
+    def _shallow_like(self):
+        """
+        bare clone of the catalog sharing the scalar metadata (cosmology,
+        header values, ...) by reference, with an empty column store. used
+        by the cutting routines, which fill in freshly-indexed column
+        arrays themselves
+        """
+        new = HaloCatalog.__new__(HaloCatalog)
+        for name, value in vars(self).items():
+            if name == '_cols':
+                continue
+            object.__setattr__(new, name, value)
+        object.__setattr__(new, '_cols', {})
+        return new
+
     def copy(self):
-        return copy.deepcopy(self)
+        """
+        copy of the catalog: the column arrays are duplicated with
+        ndarray.copy (a straight memcpy) and the scalar metadata is shared
+        by reference -- much cheaper than deep-copying the whole object
+        """
+        new = self._shallow_like()
+        new._cols = {name: col.copy() for name, col in self._cols.items()}
+        return new
 
     @timeme
     def load(self, filein, params):
@@ -41,11 +96,30 @@ class HaloCatalog():
             Contains all parameter information, will load cosmology information into this (Omega_i, sigme_8, etc)
         """
 
-        halo_info  = np.load(filein, allow_pickle=True)
-        if params.verbose: print("\thalo catalog contains:\n\t\t", halo_info.files)
+        # halo columns are carried at the working precision from the start --
+        # float32 is plenty for masses, positions and velocities, and halves
+        # the footprint of every downstream per-halo array
+        dtype = getattr(params, 'dtype', np.float32)
+
+        # each npz member is only decompressed when indexed, so read each one
+        # exactly once and close the archive as soon as the columns are out
+        # (allow_pickle is only needed for the cosmo_header dict)
+        with np.load(filein, allow_pickle=True) as halo_info:
+            if params.verbose: print("\thalo catalog contains:\n\t\t", halo_info.files)
+
+            #get cosmology from halo catalog
+            params_dict    = halo_info['cosmo_header'][()]
+
+            self.M          = halo_info['M'].astype(dtype, copy=False)     # halo mass in Msun
+            self.x_pos      = halo_info['x'].astype(dtype, copy=False)     # halo x position in comoving Mpc
+            self.y_pos      = halo_info['y'].astype(dtype, copy=False)     # halo y position in comoving Mpc
+            self.z_pos      = halo_info['z'].astype(dtype, copy=False)     # halo z position in comoving Mpc
+            self.vx         = halo_info['vx'].astype(dtype, copy=False)    # halo x velocity in km/s
+            self.vy         = halo_info['vy'].astype(dtype, copy=False)    # halo y velocity in km/s
+            self.vz         = halo_info['vz'].astype(dtype, copy=False)    # halo z velocity in km/s
+            self.redshift   = halo_info['zhalo'].astype(dtype, copy=False) # observed redshift incl velocities
+            self.zformation = halo_info['zform'].astype(dtype, copy=False) # formation redshift of halo
 
-        #get cosmology from halo catalog
-        params_dict    = halo_info['cosmo_header'][()]
         Omega_M  = params_dict.get('Omega_M')
         Omega_B  = params_dict.get('Omega_B')
         hvalue        = params_dict.get('h'      )
@@ -59,21 +133,10 @@ class HaloCatalog():
         cen_x_fov  = params_dict.get('cen_x_fov', 0.) #if the halo catalog is not centered along the z axis
         cen_y_fov  = params_dict.get('cen_y_fov', 0.) #if the halo catalog is not centered along the z axis
 
-        self.M          = halo_info['M']     # halo mass in Msun
-        self.x_pos      = halo_info['x']     # halo x position in comoving Mpc
-        self.y_pos      = halo_info['y']     # halo y position in comoving Mpc
-        self.z_pos      = halo_info['z']     # halo z position in comoving Mpc
-        self.vx         = halo_info['vx']    # halo x velocity in km/s
-        self.vy         = halo_info['vy']    # halo y velocity in km/s
-        self.vz         = halo_info['vz']    # halo z velocity in km/s
-        self.redshift   = halo_info['zhalo'] # observed redshift incl velocities
-        self.zformation = halo_info['zform'] # formation redshift of halo
-
         self.nhalo = len(self.M)
 
-        self.chi        = np.sqrt(self.x_pos**2+self.y_pos**2+self.z_pos**2)
-        self.ra         = np.arctan2(-self.x_pos,self.z_pos)*180./np.pi - cen_x_fov
-        self.dec        = np.arcsin(  self.y_pos/self.chi  )*180./np.pi - cen_y_fov
+        self.chi, self.ra, self.dec = kernels.xyz_to_sky(
+            self.x_pos, self.y_pos, self.z_pos, cen_x_fov, cen_y_fov)
 
         assert np.max(self.M) < 1.e17,             "Halos seem too massive"
         assert np.max(self.redshift) < 4.,         "need to change max redshift interpolation in tools.py"
@@ -92,8 +155,11 @@ class HaloCatalog():
 
             self.Lco = file['Lco']
             self.Lcat = file['Lcat']
-            if file['vhalo'][0] > 0:
-                self.vbroaden = file['vhalo']
+            # decompress vhalo once -- indexing the NpzFile twice would
+            # inflate the whole array twice just to probe element 0
+            vhalo = file['vhalo']
+            if vhalo[0] > 0:
+                self.vbroaden = vhalo
 
 
     @timeme
@@ -119,25 +185,24 @@ class HaloCatalog():
             params.z_i = params.z_f
             params.z_f = tz
 
-        # relevant conditions:
-        goodidx = (self.M > params.min_mass) * \
-                  (self.M < params.mass_cutoff) * \
-                  (self.redshift >= params.z_i) * \
-                  (self.redshift <= params.z_f) * \
-                  (np.abs(self.ra) <= params.fov_x/2) * \
-                  (np.abs(self.dec) <= params.fov_y/2)
-
-        goodidx = np.where(goodidx)[0]
-
-        self.indexcut(goodidx, in_place=True)
+        # relevant conditions, fused into a single pass over the columns:
+        mask = kernels.cull_mask(self.M, self.redshift, self.ra, self.dec,
+                                 params.min_mass, params.mass_cutoff,
+                                 params.z_i, params.z_f,
+                                 params.fov_x/2, params.fov_y/2)
+        goodidx = np.flatnonzero(mask)
+
+        # sort the surviving halos by mass (descending), so fluctuations in
+        # luminosity are the same with any given mass cut. sorting the index
+        # array before the cut means the columns are gathered once instead of
+        # being rewritten by two back-to-back indexcuts. negating the masses
+        # sorts descending directly, keeping the index stride-1 for the
+        # gathers rather than a reversed view
+        order = np.argsort(-self.M[goodidx])
+        self.indexcut(goodidx[order], in_place=True)
 
         if params.verbose: print('\n\t%d halos remain after mass/map cut' % self.nhalo)
 
-        # sort halos by mass, so fluctuations in luminosity
-        # are the same with any given mass cut
-        sortidx = np.argsort(self.M)[::-1]
-        self.indexcut(sortidx, in_place=True)
-
     ### MESS WITH THE OBSERVATIONAL PROPERTIES OF THE CATALOG
     def get_velocities(self, params):
         """
@@ -168,54 +233,70 @@ class HaloCatalog():
         params.filterfunc: scipy.ndimage filter kernel
             function to generate an arbitrary one-dimensional gaussian filter
         """
-        vvir = lambda M,z:35*(M*self.cosmo.H(z).value/1e10)**(1/3) # km/s
+        # tabulate H(z) once per catalog -- astropy's cosmo.H evaluated on a
+        # full halo-sized array is a slow pure-python Quantity path -- and
+        # interpolate onto the halo redshifts instead
+        if '_H_of_z_grid' not in vars(self):
+            zgrid = np.linspace(0, 4, 4096)
+            self._H_of_z_grid = (zgrid, self.cosmo.H(zgrid).to(u.km/u.s/u.Mpc).value)
+
+        def vvir(M, z): # km/s
+            zgrid, Hgrid = self._H_of_z_grid
+            return 35*np.cbrt(M*np.interp(z, zgrid, Hgrid)/1e10)
+
+        # all draws go through the catalog's seeded generator
+        rng = self._rng
+
+        def draw_sin_i():
+            # sin(i) = sqrt(1 - u^2) for uniform u, computed in the draw
+            # buffer itself (float32 is plenty for an inclination factor)
+            u_i = rng.random(self.nhalo, dtype=np.float32)
+            np.square(u_i, out=u_i)
+            np.subtract(1.0, u_i, out=u_i)
+            np.sqrt(u_i, out=u_i)
+            return u_i
 
         if params.velocity_attr == 'vvirincli':
             # Calculate doppler parameters
-            self.sin_i = np.sqrt(1-np.random.uniform(size=self.nhalo)**2)
+            self.sin_i = draw_sin_i()
             self.vvir = vvir(self.M, self.redshift) # / 2 #****
             self.vbroaden = self.vvir*self.sin_i/0.866
 
         elif params.velocity_attr == 'vvirincli_scaled':
             # scale the virial velocity by an input parameter for testing
-            self.sin_i = np.sqrt(1-np.random.uniform(size=self.nhalo)**2)
+            self.sin_i = draw_sin_i()
             self.vvir = vvir(self.M, self.redshift)
             self.vbroaden = self.vvir*self.sin_i/0.866/params.vvirscalefactor
 
         elif params.velocity_attr == 'vvirincli_cutoff':
             # cut off the virial velocity at some cutoff value (so it's not 
             # overestimated for the most massive halos)
-            self.sin_i = np.sqrt(1-np.random.uniform(size=self.nhalo)**2)
+            self.sin_i = draw_sin_i()
             self.vvir = vvir(self.M, self.redshift)
             vbroaden = self.vvir*self.sin_i/0.866
-            # taking the remainder around the boundary condition (to avoid a big bump right there)
-            ofidx = np.where(vbroaden > params.vvircutoff)
-            vbroaden[ofidx] = vbroaden[ofidx] % params.vvircutoff
+            # clip at the boundary in a single streaming pass. this used to
+            # wrap overflowing velocities with a modulo, which sent a halo
+            # just over the cutoff all the way back to ~0
+            np.minimum(vbroaden, params.vvircutoff, out=vbroaden)
             self.vbroaden = vbroaden
 
         elif params.velocity_attr == 'vmpeak':
             # universemachine v_m,peak velocity NOT scaled by inclination
-            a = 1 / (1+self.redshift)
-            M200 = (1.64e12)/((a/0.378)**-0.142 + (a/0.378)**-1.79)
-            vmpeak = 200 * (self.M / M200)**0.3
-            rng = np.random.default_rng(12345)
-            scvmpeak = 10**(np.log10(vmpeak)*rng.normal(1,0.1, len(vmpeak)))
-            self.vbroaden = scvmpeak
+            # (the 0.1 dex lognormal scatter is drawn here and folded into
+            # the fused kernel)
+            noise = rng.normal(1, 0.1, self.nhalo)
+            self.vbroaden = kernels.vmpeak(self.M, self.redshift, noise)
 
         elif params.velocity_attr == 'vmpeakincli':
             # universemachine v_m,peak velocity scaled by inclination
             # with an additional lognormal scatter of 0.1 dex
-            self.sin_i = np.sqrt(1-np.random.uniform(size=self.nhalo)**2)
-            a = 1 / (1+self.redshift)
-            M200 = (1.64e12)/((a/0.378)**-0.142 + (a/0.378)**-1.79)
-            vmpeak = 200 * (self.M / M200)**0.3
-            rng = np.random.default_rng(12345)
-            scvmpeak = 10**(np.log10(vmpeak)*rng.normal(1,0.1, len(vmpeak)))
-            self.vbroaden = scvmpeak*self.sin_i/0.866
+            self.sin_i = draw_sin_i()
+            noise = rng.normal(1, 0.1, self.nhalo)
+            self.vbroaden = kernels.vmpeak(self.M, self.redshift, noise)*self.sin_i/0.866
 
         elif params.velocity_attr == 'vvir':
             # straight virial velocity
-            self.sin_i = np.sqrt(1-np.random.uniform(size=self.nhalo)**2)
+            self.sin_i = draw_sin_i()
             self.vbroaden = vvir(self.M, self.redshift)
 
         params.filterfunc = gaussian_filter1d
@@ -263,7 +344,6 @@ class HaloCatalog():
             uses specifically
                 params.lcat_cutoff: the lower limit on catalog luminosity to include (in Lsun)
                 params.goal_nobj: number of catalog objects to include once the cut is made
-                params.vcat_seed: rng seed (using the velocity one)
                 params.obs_weight: whether observation culling should be logarithmic or linear
         in_place: bool (optional, default=True)
             if True, performs cuts on this HaloCatalog object. if False, returns a copy of the object
@@ -274,38 +354,29 @@ class HaloCatalog():
             copy of the input HaloCatalog object with the observational cuts applied
         """
 
-        if not in_place:
-            halos = self.copy()
+        # one code path for both cases -- operate on self or on a copy
+        halos = self if in_place else self.copy()
 
         # cut by luminosity
-        if in_place:
-            self.attrcut_subset('Lcat', params.lcat_cutoff, np.nanmax(self.Lcat)+10, params, in_place=True)
-        else:
-            halos.attrcut_subset('Lcat', params.lcat_cutoff, np.nanmax(self.Lcat)+10, params, in_place=True)
-
-        if params.goal_nobj > 0:
-            if in_place:
-                # select nobj random objects from the leftover catalog
-                rng = np.random.default_rng(params.vcat_seed)
-                if params.obs_weight == 'linear':
-                    weights = self.Lcat / np.sum(self.Lcat)
-                elif params.obs_weight == 'log':
-                    weights = np.log10(self.Lcat) / np.sum(np.log10(self.Lcat))
-                keepidx = rng.choice(self.nhalo, params.goal_nobj, replace=False, p=weights) #*** use probability here to weight selections
-                # cut to these objects
-                self.indexcut(keepidx, in_place=True)
-            else:
-                # select nobj random objects from the leftover catalog
-                rng = np.random.default_rng(params.vcat_seed)
-                if params.obs_weight == 'linear':
-                    weights = halos.Lcat / np.sum(halos.Lcat)
-                elif params.obs_weight == 'log':
-                    weights = np.log10(halos.Lcat) / np.sum(np.log10(halos.Lcat))
-                keepidx = rng.choice(halos.nhalo, params.goal_nobj, replace=False, p=weights) #*** use probability here to weight selections
-                # cut to these objects
-                halos.indexcut(keepidx, in_place=True)
-
-        if params.verbose: print('\n\t%d halos remain after observability cuts' % self.nhalo)
+        halos.attrcut_subset('Lcat', params.lcat_cutoff, np.nanmax(halos.Lcat)+10, params, in_place=True)
+
+        if params.goal_nobj > 0 and params.goal_nobj < halos.nhalo:
+            # select nobj random objects from the leftover catalog, weighted
+            # by luminosity. drawing without replacement via the Gumbel
+            # top-k trick -- perturb the log-weights with Gumbel noise and
+            # keep the goal_nobj largest keys -- which matches the weighted
+            # rng.choice(replace=False) distribution without ever
+            # normalizing the weights or building the O(N k) choice
+            if params.obs_weight == 'linear':
+                logits = np.log(halos.Lcat)
+            elif params.obs_weight == 'log':
+                logits = np.log(np.log10(halos.Lcat))
+            keys = logits + halos._rng.gumbel(size=halos.nhalo)
+            keepidx = np.argpartition(-keys, params.goal_nobj)[:params.goal_nobj]
+            # cut to these objects
+            halos.indexcut(keepidx, in_place=True)
+
+        if params.verbose: print('\n\t%d halos remain after observability cuts' % halos.nhalo)
 
         if not in_place:
             return halos
@@ -331,29 +402,27 @@ class HaloCatalog():
         """
         # assert np.max(idx) <= self.nhalo,   "Too many indices"
 
+        # a full, in-order index is a no-op for an in-place cut -- don't
+        # rewrite every column. the endpoint checks gate the full comparison
+        # so the common (something-was-cut) case stays O(1)
+        idx = np.asarray(idx)
+        if (in_place and idx.dtype.kind in 'iu' and idx.size == self.nhalo
+                and idx.size > 0 and idx[0] == 0 and idx[-1] == self.nhalo - 1
+                and np.array_equal(idx, np.arange(idx.size))):
+            return
+
         if not in_place:
-            # new halos object to hold the cut catalog
-            subset = self.copy()
-
-            # copy all the arrays over, indexing as you go
-            for i in dir(self):
-                if i[0]=='_': continue
-                try:
-                    setattr(subset, i, getattr(self,i)[idx])
-                except TypeError:
-                    pass
+            # new halos object to hold the cut catalog, with every column
+            # indexed in one bulk pass over the store
+            subset = self._shallow_like()
+            subset._cols = {name: col[idx] for name, col in self._cols.items()}
             subset.nhalo = len(subset.M)
 
         else:
 
-            # replace all the arrays with an indexed version
-            for i in dir(self):
-                if i[0]=='_': continue
-                try:
-                    setattr(self, i, getattr(self,i)[idx])
-                except TypeError:
-                    pass
-                self.nhalo = len(self.M)
+            # replace the column store with an indexed version
+            self._cols = {name: col[idx] for name, col in self._cols.items()}
+            self.nhalo = len(self.M)
 
         if not in_place:
             return subset
@@ -383,34 +452,23 @@ class HaloCatalog():
             a copy of the input HaloCatalog object with the cuts applied
         """
 
-        keepidx = np.where(np.logical_and(getattr(self,attr) > minval,
-                                          getattr(self,attr) <= maxval))[0]
+        vals = getattr(self, attr)
+        keepidx = np.flatnonzero((vals > minval) & (vals <= maxval))
 
         if not in_place:
-            # new halos object to hold the cut catalog
-            subset = self.copy()
-
-            # copy all the arrays over, indexing as you go
-            for i in dir(self):
-                if i[0]=='_': continue
-                try:
-                    setattr(subset, i, getattr(self,i)[keepidx])
-                except TypeError:
-                    pass
+            # new halos object to hold the cut catalog, with every column
+            # indexed in one bulk pass over the store
+            subset = self._shallow_like()
+            subset._cols = {name: col[keepidx] for name, col in self._cols.items()}
             nhalo = len(subset.M)
             subset.nhalo = nhalo
 
         else:
 
-            # replace all the arrays with an indexed version
-            for i in dir(self):
-                if i[0]=='_': continue
-                try:
-                    setattr(self, i, getattr(self,i)[keepidx])
-                except TypeError:
-                    pass
-                nhalo = len(self.M)
-                self.nhalo = nhalo
+            # replace the column store with an indexed version
+            self._cols = {name: col[keepidx] for name, col in self._cols.items()}
+            nhalo = len(self.M)
+            self.nhalo = nhalo
 
         if params.verbose: print('\n\t%d halos remain after attribute cut' % nhalo)
 
@@ -461,39 +519,38 @@ class HaloCatalog():
         if params.verbose: print('\n\tSaving Halo catalog to\n\t\t', params.cat_output_file)
 
         # trim the catalog to the first N=trim objects if trim is passed
-        if trim:
-            i = trim
-        else:
-            i = -1
+        # (slice(None, None) keeps everything -- the old [:-1] default
+        # silently dropped the last halo from the saved catalog)
+        i = slice(None, trim)
 
         # fill in the velocity array with negatives if they haven't already been calculated
         try:
-            velocities = self.vbroaden[:i]
+            velocities = self.vbroaden[i]
         except AttributeError:
-            velocities = np.ones(len(self.dec[:i])) * -99
+            velocities = np.ones(len(self.dec[i])) * -99
 
         # write
         if writeall:
             np.savez(params.cat_output_file,
-                     dec=self.dec[:i], nhalo=len(self.dec[:i]),
-                     nu=self.nu[:i], ra=self.ra[:i],
-                     z=self.redshift[:i], vx=self.vx[:i],
-                     vz    = self.vz[:i],
-                     x_pos   = self.x_pos[:i],
-                     y_pos = self.y_pos[:i],
-                     z_pos        = self.z_pos[:i],
-                     zformation=self.zformation[:i],
-                     Lco = self.Lco[:i],
-                     Lcat = self.Lcat[:i],
+                     dec=self.dec[i], nhalo=len(self.dec[i]),
+                     nu=self.nu[i], ra=self.ra[i],
+                     z=self.redshift[i], vx=self.vx[i],
+                     vz    = self.vz[i],
+                     x_pos   = self.x_pos[i],
+                     y_pos = self.y_pos[i],
+                     z_pos        = self.z_pos[i],
+                     zformation=self.zformation[i],
+                     Lco = self.Lco[i],
+                     Lcat = self.Lcat[i],
                      vhalo = velocities,
-                     M = self.M[:i])
+                     M = self.M[i])
         else:
             np.savez(params.cat_output_file,
-                     dec = self.dec[:i], ra = self.ra[:i],
-                     z = self.redshift[:i],
-                     Lco = self.Lco[:i],
-                     Lcat = self.Lcat[:i],
+                     dec = self.dec[i], ra = self.ra[i],
+                     z = self.redshift[i],
+                     Lco = self.Lco[i],
+                     Lcat = self.Lcat[i],
                      vhalo = velocities,
-                     M = self.M[:i])
+                     M = self.M[i])
 
         return
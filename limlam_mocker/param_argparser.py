@@ -407,3 +407,17 @@ parser.add_argument(
     default='sim_cat.npz',
     help="(SimGenerator) File name for the final simulated catalog (.npz). Default sim_cat.npz" #*****
 )
+
+parser.add_argument(
+    "--dtype",
+    type=str,
+    default='float32',
+    help="(SimGenerator) Floating-point precision used for the per-halo luminosity calculations ('float32' or 'float64'). Default float32."
+)
+
+parser.add_argument(
+    "--rng_seed",
+    type=int,
+    default=12345,
+    help="(SimGenerator) Seed for the halo catalog's random number generator (velocity scatter, inclinations, observational selection). Default 12345."
+)
@@ -48,6 +48,9 @@ class SimParameters():
         else:
             assert self.cosmology != 'comap', "Don't recognize this cosmology"
 
+        # working floating-point precision for the per-halo calculations
+        self.dtype = np.dtype(self.dtype)
+
         # other calculated metainfo
         self.z_i    = self.nu_rest/self.nu_i - 1
         self.z_f    = self.nu_rest/self.nu_f - 1